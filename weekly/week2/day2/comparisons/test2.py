@@ -1,6 +1,65 @@
 import os
+import json
+import shelve
+import hashlib
 from openai import OpenAI
 
+# 本地响应缓存（shelve文件），重复运行时相同提问不再调用模型
+CACHE_PATH = "llm_cache"
+# 仅温度不高于该值时启用缓存（输出足够稳定，复用结果不影响对比）
+CACHEABLE_MAX_TEMPERATURE = 0.3
+# 近似提问缓存：用户输入Embedding余弦相似度≥阈值即复用结果。
+# 本实验对比的正是语义相近的两组输入，开启后会互相命中，故默认关闭
+ENABLE_SEMANTIC_CACHE = False
+SEMANTIC_THRESHOLD = 0.95
+
+def get_embedding(client, text):
+    """获取文本Embedding并做L2归一化（用于近似提问匹配）"""
+    import numpy as np  # 仅近似提问缓存需要，放在函数内避免默认配置下依赖numpy
+    resp = client.embeddings.create(model="text-embedding-v4", input=[text], dimensions=256)
+    vec = np.asarray(resp.data[0].embedding, dtype=np.float32)
+    return vec / max(np.linalg.norm(vec), 1e-12)
+
+def cached_chat(client, model, system_prompt, user_content, temperature, max_tokens):
+    """
+    带缓存的对话调用：先按完整请求参数精确匹配，再（可选）按用户输入语义近似匹配，均未命中才调用模型
+    :return: 模型输出文本
+    """
+    def call_model():
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': user_content}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return completion.choices[0].message.content
+
+    if temperature > CACHEABLE_MAX_TEMPERATURE:
+        return call_model()
+
+    # 除用户输入外的请求参数，近似匹配时要求完全一致
+    params_key = json.dumps({"model": model, "system_prompt": system_prompt, "temperature": temperature,
+                             "max_tokens": max_tokens}, sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha256(f"{params_key}|{user_content}".encode("utf-8")).hexdigest()
+    with shelve.open(CACHE_PATH) as cache:
+        if key in cache:
+            return cache[key]["response"]
+
+        embedding = None
+        if ENABLE_SEMANTIC_CACHE:
+            embedding = get_embedding(client, user_content)
+            for entry in cache.values():
+                if (entry["params"] == params_key and entry["embedding"] is not None
+                        and float(embedding @ entry["embedding"]) >= SEMANTIC_THRESHOLD):
+                    return entry["response"]
+
+        response_content = call_model()
+        cache[key] = {"params": params_key, "embedding": embedding, "response": response_content}
+    return response_content
+
 try:
     client = OpenAI(
         # 若没有配置环境变量，请用阿里云百炼API Key将下行替换为：api_key="sk-xxx",
@@ -26,19 +85,17 @@ try:
         print(f"【输入内容】：{user_content}")
         print(f"【模型输出】：")
         
-        # 发起API调用（保持模型参数一致，确保对比有效性）
-        completion = client.chat.completions.create(
+        # 发起API调用（保持模型参数一致，确保对比有效性；命中缓存时直接复用上次结果）
+        response_content = cached_chat(
+            client,
             model="qwen-plus",  # 模型列表：https://help.aliyun.com/zh/model-studio/getting-started/models
-            messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_content}
-            ],
+            system_prompt=system_prompt,
+            user_content=user_content,
             temperature=0.3,  # 固定温度值，避免输出随机性影响对比
             max_tokens=1000    # 限制输出长度，保证回复简洁完整
         )
         
         # 打印模型输出
-        response_content = completion.choices[0].message.content
         print(response_content)
         print("-" * 80)  # 分隔线，清晰区分两组结果
 
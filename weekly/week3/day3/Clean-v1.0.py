@@ -1,12 +1,22 @@
 import pandas as pd
 import numpy as np
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 import os
+import multiprocessing
+
+#日志队列与监听线程（模块级维护：队列处理器只挂一次；监听线程每次调用setup_logger时按本次的处理器重建）
+_log_queue = queue.Queue(-1)
+_log_listener = None
 
 #1.日志配置
 def setup_logger(log_path):
-    '''配置日志：同时输出到控制台和日志文件，记录清洗全流程'''
+    '''配置日志：同时输出到控制台和日志文件，记录清洗全流程
+    日志先进入内存队列，由后台监听线程统一写出，清洗流程中的每条日志不再同步写文件
+    流程结束时需调用stop_logger()，确保队列中的日志全部落盘'''
+    global _log_listener
     #日志文件名包含时间戳，避免覆盖
     log_file = f"{log_path}_清洗日志_{datetime.now().strftime('%Y%M%d_%H%M%S')}.log"
     
@@ -20,16 +30,32 @@ def setup_logger(log_path):
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     #文件处理器
-    file_handler = logging.FileHandler(log_file,encoding='utf-8')
+    file_handler = logging.FileHandler(log_file,encoding='utf-8',delay=True)   #delay:首次写日志时才创建文件
     file_handler.setFormatter(formatter)
 
-    #避免重复添加处理器
-    if not logger.handlers:
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+    #避免重复添加处理器：logger只挂一个队列处理器，控制台/文件处理器由监听线程调用
+    if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+        logger.addHandler(QueueHandler(_log_queue))
+    #上一次的监听线程未停止时先停止，保证同一队列上只有一个线程，且本次日志写入本次的文件
+    stop_logger()
+    _log_listener = QueueListener(_log_queue, console_handler, file_handler)
+    _log_listener.start()
 
     return logger,log_file
 
+def stop_logger():
+    '''停止日志监听线程：写出队列中剩余的日志并关闭日志文件（未启动时不做任何处理）'''
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+def normalize_str_col(series):
+    '''字符串列标准化：去空格+统一大写（模块级函数，便于多进程序列化）'''
+    return series.astype(str).str.strip().str.upper()
+
 #2.核心清洗函数（可配置参数）
 def clean_csv_data(
         input_path,         #输入CSV文件路径
@@ -39,7 +65,8 @@ def clean_csv_data(
         missing_fill_strategy="auto",   #缺失值填充策略：auto/mean/median/mode/drop
         missing_col_threshold=30.0,     #列缺失率阈值（%），超过则删除列
         outlier_method="IQR",       #异常值判定方法:IQR/3σ
-        outlier_threshold=5.0       #异常值占比阈值（%），超过则提示
+        outlier_threshold=5.0,      #异常值占比阈值（%），超过则提示
+        normalize_workers=1         #字符串标准化并行进程数，1为串行
 ):
     """
     通用CSV数据清洗函数（支持参数配置）
@@ -56,6 +83,7 @@ def clean_csv_data(
     :param missing_col_threshold: 列缺失率阈值（%），>该值删除列
     :param outlier_method: 异常值判定方法（IQR/3σ）
     :param outlier_threshold: 异常值占比阈值（%），>该值仅提示不处理
+    :param normalize_workers: 字符串标准化的并行进程数，>1时按列分发到多个进程
     :return: 清洗后DataFrame、日志文件路径
     """
     #初始化日志
@@ -104,97 +132,109 @@ def clean_csv_data(
         
         #4)缺失值处理
         logger.info("\n4)缺失值处理")
-        for col in df.columns:
-            #跳过没有缺失列
-            if df[col].isnull().sum() == 0:
-                continue
-            #先处理缺失率超过阈值的列
-            col_missing_rate = (df[col].isnull().sum() / len(df) *100).round(2)
-            if col_missing_rate > missing_col_threshold:
-                logger.info(f"列[{col}]缺失率{col_missing_rate}% > 阈值{missing_col_threshold}%,删除该列")
-                df = df.drop(columns=[col])
-                continue
-
-            #处理列内缺失值
-            if missing_fill_strategy == "drop":
-                df = df.dropna(subset=[col])
-                logger.info(f"列[{col}]:删除缺失行，当前行数：{len(df)}")
-            else:
-                #根据策略选择填充值
-                if df[col].dtype in ['int64','float64']:
-                    if missing_fill_strategy == "mean":
-                        fill_val = df[col].mean().round(2)
-                    elif missing_fill_strategy == "median":
-                        fill_val = df[col].median()
-                    else:   #auto/默认
-                        fill_val = df[col].median()
-                else:
-                    fill_val = df[col].mode()[0] #类别列用众数
-
-                df[col] = df[col].fillna(fill_val)
+        #一次性统计各列缺失数，避免逐列重复扫描；未删除重复行时直接复用第2步的missing_sum
+        #缺失率（取整）仅用于阈值判断和日志
+        col_missing_count = missing_sum if duplicate_count == 0 else df.isnull().sum()
+        col_missing_rate = (col_missing_count / len(df) * 100).round(2)
+        #先处理缺失率超过阈值的列（一次性删除）
+        drop_cols = col_missing_rate[col_missing_rate > missing_col_threshold].index
+        for col in drop_cols:
+            logger.info(f"列[{col}]缺失率{col_missing_rate[col]}% > 阈值{missing_col_threshold}%,删除该列")
+        df = df.drop(columns=drop_cols)
+        #跳过没有缺失列（按缺失数判断，极低缺失率取整后为0.0也不会漏掉）
+        fill_cols = [col for col in df.columns if col_missing_count[col] > 0]
+
+        #处理列内缺失值
+        if fill_cols and missing_fill_strategy == "drop":
+            df = df.dropna(subset=fill_cols)
+            logger.info(f"列{fill_cols}:删除缺失行，当前行数：{len(df)}")
+        elif fill_cols:
+            #根据策略构建 {列: 填充值}，再用一次fillna完成填充
+            #数值列沿用第2步选出的numeric_cols（去重不改变列类型），无需逐列判断dtype
+            num_fill_cols = [col for col in fill_cols if col in numeric_cols]
+            cat_fill_cols = [col for col in fill_cols if col not in num_fill_cols]
+            if missing_fill_strategy == "mean":
+                fill_map = df[num_fill_cols].mean().round(2).to_dict()
+            else:   #median/auto/默认
+                fill_map = df[num_fill_cols].median().to_dict()
+            fill_map.update({col: df[col].mode()[0] for col in cat_fill_cols}) #类别列用众数
+
+            df = df.fillna(fill_map)
+            for col, fill_val in fill_map.items():
                 logger.info(f"列[{col}]：填充缺失值（策略={missing_fill_strategy} | 填充值={fill_val}）")
 
-                #5)异常值处理（仅数值列）
-                logger.info("\n5)异常值处理")
-                for col in numeric_cols:
-                    if col not in df.columns:   #避免列已被删除
-                        continue
-
-                    #异常值判定
-                    if outlier_method == "3σ":
-                        mean_val = df[col].mean()
-                        std_val = df[col].std()
-                        lower_bound = mean_val - 3*std_val
-                        upper_bound = mean_val + 3*std_val
-                    else:   #IQR(默认)
-                        Q1 = df[col].quantile(0.25)
-                        Q3 = df[col].quantile(0.75)
-                        IQR = Q3 - Q1
-                        lower_bound = Q1 - 1.5*IQR
-                        upper_bound = Q3 + 1.5*IQR
-
-                    #筛选异常值
-                    outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-                    outlier_count = len(outliers)
-                    outlier_rate = (outlier_count / len(df) * 100).round(2)
-                    logger.info(f"列[{col}]：异常值数量={outlier_count} | 占比={outlier_rate}% | 判定范围=[{lower_bound:.2f},{upper_bound:.2f}]")
-
-                    #异常值处理：占比<=阈值则删除，超过则仅提示
-                    if outlier_rate > 0:
-                        if outlier_rate <= outlier_threshold:
-                            df = df[(df[col] >= lower_bound) & (df[col] <= upper_bound)]
-                            logger.info(f"列[{col}]：已删除异常行，当前行数：{len(df)}")
-                        else:
-                            logger.warning(f"列[{col}]：异常值占比超过阈值（{outlier_threshold}%）,请排查数据采集问题，暂不处理")
-
-                #6)格式标准化
-                logger.info("6)格式标准化")
-                #字符串列：去空格、同一大写
-                str_cols = df.select_dtypes(include=['object']).columns
-                for col in str_cols:
-                    df[col] = df[col].astype(str).str.strip().str.upper()
-                    logger.info(f"列[{col}]：完成字符串标准化（去空格+大写）")
-
-                #时间列：自动识别并标准化
-                time_cols = [col for col in df.columns if any(key in col.lower() for key in ['time','date','dt'])]
-                for col in time_cols:
-                    df[col] = pd.to_datetime(df[col],errors='coerce')   #coerce=“强制”，转换失败的单个值会被设为NaT（Not a Time，时间类型的缺失值），而不是终止程序；
-                    logger.info(f"列[{col}]：标准化为datetime格式")
-                
-                #7)数据保存
-                logger.info("\n7)数据保存")
-                df.to_csv(output_path,index=False,encoding='utf-8')
-                final_shape = df.shape
-                logger.info(f"清洗完成！输出文件：{output_path}")
-                logger.info(f"最终数据维度：{final_shape[0]}行 * {final_shape[1]}列")
-                logger.info(f"数据清洗总览：删除重复行{original_shape[0]-df.shape[0]}行 | 保留列{final_shape[1]}列")
-                logger.info("="*50)
-                
-                return df,log_file
+        #5)异常值处理（仅数值列）
+        logger.info("\n5)异常值处理")
+        outlier_cols = numeric_cols.intersection(df.columns)    #避免列已被删除
+        num_df = df[outlier_cols]
+
+        #异常值判定：一次性计算所有数值列的上下界
+        if outlier_method == "3σ":
+            #mean()/std()在没有数值列时返回空Series，后续比较与统计自然跳过
+            mean_val = num_df.mean()
+            std_val = num_df.std()
+            lower_bound = mean_val - 3*std_val
+            upper_bound = mean_val + 3*std_val
+        else:   #IQR(默认)
+            quantiles = num_df.quantile([0.25,0.75])
+            Q1 = quantiles.loc[0.25]
+            Q3 = quantiles.loc[0.75]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5*IQR
+            upper_bound = Q3 + 1.5*IQR
+
+        #筛选异常值（按列广播比较，得到逐列异常掩码）
+        outlier_mask = num_df.lt(lower_bound) | num_df.gt(upper_bound)
+        outlier_count = outlier_mask.sum()
+        outlier_rate = (outlier_count / len(df) * 100).round(2)
+        for col in outlier_cols:
+            logger.info(f"列[{col}]：异常值数量={outlier_count[col]} | 占比={outlier_rate[col]}% | 判定范围=[{lower_bound[col]:.2f},{upper_bound[col]:.2f}]")
+            if outlier_rate[col] > outlier_threshold:
+                logger.warning(f"列[{col}]：异常值占比超过阈值（{outlier_threshold}%）,请排查数据采集问题，暂不处理")
+
+        #异常值处理：占比<=阈值的列合并为一个掩码，一次删除；超过则仅提示
+        remove_cols = outlier_rate[(outlier_rate > 0) & (outlier_rate <= outlier_threshold)].index
+        if len(remove_cols) > 0:
+            df = df[~outlier_mask[remove_cols].any(axis=1)]
+            logger.info(f"列{list(remove_cols)}：已删除异常行，当前行数：{len(df)}")
+
+        #6)格式标准化
+        logger.info("6)格式标准化")
+        #字符串列：去空格、同一大写
+        str_cols = df.select_dtypes(include=['object']).columns
+        if normalize_workers > 1 and len(str_cols) > 1:
+            #各列相互独立，按列分发到进程池并行处理
+            #日志监听线程此时在运行，fork会复制其持有的锁导致子进程死锁，故用spawn启动子进程
+            with multiprocessing.get_context("spawn").Pool(min(normalize_workers, len(str_cols))) as pool:
+                normalized = pool.map(normalize_str_col, [df[col] for col in str_cols])
+        else:
+            normalized = map(normalize_str_col, (df[col] for col in str_cols))
+        for col, result in zip(str_cols, normalized):
+            df[col] = result
+            logger.info(f"列[{col}]：完成字符串标准化（去空格+大写）")
+
+        #时间列：自动识别并标准化
+        time_cols = [col for col in df.columns if any(key in col.lower() for key in ['time','date','dt'])]
+        for col in time_cols:
+            df[col] = pd.to_datetime(df[col],errors='coerce')   #coerce=“强制”，转换失败的单个值会被设为NaT（Not a Time，时间类型的缺失值），而不是终止程序；
+            logger.info(f"列[{col}]：标准化为datetime格式")
+        
+        #7)数据保存
+        logger.info("\n7)数据保存")
+        df.to_csv(output_path,index=False,encoding='utf-8')
+        final_shape = df.shape
+        logger.info(f"清洗完成！输出文件：{output_path}")
+        logger.info(f"最终数据维度：{final_shape[0]}行 * {final_shape[1]}列")
+        logger.info(f"数据清洗总览：删除重复行{original_shape[0]-df.shape[0]}行 | 保留列{final_shape[1]}列")
+        logger.info("="*50)
+        
+        return df,log_file
         
     except Exception as e:
         logger.error(f"清洗过程出错：{str(e)}",exc_info=True)
         raise       
+    finally:
+        stop_logger()     #停止监听线程前会写出队列中剩余的日志
 
 # ===================== 3. 测试：学生成绩数据 =====================
 def generate_test_student_data(test_path="学生成绩_原始数据.csv"):